@@ -1,13 +1,19 @@
-from folder_replicator.config_manager import ConfigManager
-from folder_replicator.synchronization import Synchronizer
-from folder_replicator.watcher import ReplicationWatcher
-from folder_replicator.cli import main
-from folder_replicator.logger import setup_logger
-
-__all__ = [
-    'ConfigManager',
-    'Synchronizer',
-    'ReplicationWatcher',
-    'main',
-    'setup_logger',
-]
+import importlib
+
+# Exports are resolved on first access so that importing the package (as
+# the frep entry point does) does not pull in watchdog or the synchronizer
+_EXPORTS = {
+    'ConfigManager': 'folder_replicator.config_manager',
+    'Synchronizer': 'folder_replicator.synchronization',
+    'ReplicationWatcher': 'folder_replicator.watcher',
+    'main': 'folder_replicator.cli',
+    'setup_logger': 'folder_replicator.logger',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from folder_replicator.file_operations import FileOperations
+
+logger = logging.getLogger("FolderReplicator")
+
+
+class LocalFileSystem:
+    def stat(self, path):
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+
+    def makedirs(self, path):
+        return FileOperations.ensure_directory_exists(path)
+
+    def files_identical(self, file1, file2):
+        return FileOperations.files_identical(file1, file2)
+
+    def copy(self, src, dest):
+        return FileOperations.safe_copy(src, dest)
+
+
+class AsyncPipeline:
+    def __init__(self, synchronizer, concurrency=32, fs=None):
+        self.synchronizer = synchronizer
+        self.concurrency = concurrency
+        self.fs = fs or LocalFileSystem()
+        self._executor = None
+
+    def run(self, source, destination, exclusions, stats):
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            self._executor = executor
+            try:
+                asyncio.run(self._run(source, destination, exclusions, stats))
+            finally:
+                self._executor = None
+
+        # Copies overlap, so throughput is measured against wall time
+        # rather than the sum of individual copy durations
+        if stats['bytes']:
+            stats['copy_time'] += time.time() - start_time
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _run(self, source, destination, exclusions, stats):
+        stat_queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        compare_queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        copy_queue = asyncio.Queue(maxsize=self.concurrency * 4)
+
+        workers = []
+        for _ in range(self.concurrency):
+            workers.append(asyncio.ensure_future(self._stat_worker(
+                stat_queue, compare_queue, copy_queue, stats)))
+            workers.append(asyncio.ensure_future(self._compare_worker(
+                compare_queue, copy_queue, stats)))
+            workers.append(asyncio.ensure_future(
+                self._copy_worker(copy_queue, stats)))
+
+        try:
+            await self._walk(source, destination, exclusions, stat_queue, stats)
+            # Each stage forwards an item before marking it done, so joining
+            # the queues in order drains the whole pipeline
+            await stat_queue.join()
+            await compare_queue.join()
+            await copy_queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _walk(self, source, destination, exclusions, stat_queue, stats):
+        for root, dirs, files in os.walk(source):
+            dirs[:] = [d for d in dirs if not self.synchronizer._is_excluded(
+                os.path.join(root, d), exclusions)]
+            dest_dir = os.path.join(destination, os.path.relpath(root, source))
+            # Directory creation runs alongside the walk; file items wait on
+            # it before touching the destination
+            dir_ready = asyncio.ensure_future(self._make_dir(dest_dir, stats))
+
+            for file in files:
+                src_file = os.path.join(root, file)
+                if self.synchronizer._is_excluded(src_file, exclusions):
+                    logger.debug(f"Skipping excluded file: {src_file}")
+                    stats['skipped'] += 1
+                    continue
+                await stat_queue.put((src_file, os.path.join(dest_dir, file), dir_ready))
+
+    async def _make_dir(self, path, stats):
+        if await self._call(self.fs.makedirs, path):
+            return True
+        stats['errors'] += 1
+        logger.warning(f"Failed to create directory: {path}")
+        return False
+
+    async def _stat_worker(self, stat_queue, compare_queue, copy_queue, stats):
+        while True:
+            src_file, dest_file, dir_ready = await stat_queue.get()
+            try:
+                if not await dir_ready:
+                    continue
+                dest_stat = await self._call(self.fs.stat, dest_file)
+                if dest_stat is None or dest_stat.st_size != os.path.getsize(src_file):
+                    await copy_queue.put((src_file, dest_file))
+                else:
+                    await compare_queue.put((src_file, dest_file))
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error checking {dest_file}: {e}")
+            finally:
+                stat_queue.task_done()
+
+    async def _compare_worker(self, compare_queue, copy_queue, stats):
+        while True:
+            src_file, dest_file = await compare_queue.get()
+            try:
+                if await self._call(self.fs.files_identical, src_file, dest_file):
+                    logger.debug(f"Files identical, skipping: {src_file}")
+                    stats['skipped'] += 1
+                else:
+                    logger.debug(f"Files different, updating: {src_file}")
+                    await copy_queue.put((src_file, dest_file))
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error comparing {src_file}: {e}")
+            finally:
+                compare_queue.task_done()
+
+    async def _copy_worker(self, copy_queue, stats):
+        while True:
+            src_file, dest_file = await copy_queue.get()
+            try:
+                if await self._call(self.fs.copy, src_file, dest_file):
+                    stats['copied'] += 1
+                    stats['bytes'] += os.path.getsize(src_file)
+                    logger.info(f"Copied: {src_file} -> {dest_file}")
+                else:
+                    stats['errors'] += 1
+                    logger.warning(f"Failed to copy: {src_file}")
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error copying {src_file}: {e}")
+            finally:
+                copy_queue.task_done()
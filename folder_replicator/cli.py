@@ -1,15 +1,93 @@
 import argparse
+import json
+import os
 import sys
+from datetime import timedelta
 from pathlib import Path
-import importlib.metadata
 from folder_replicator.config_manager import ConfigManager
-from folder_replicator.synchronization import Synchronizer
-from folder_replicator.watcher import ReplicationWatcher
 from folder_replicator.logger import setup_logger
+from folder_replicator.rpc import DaemonClient
+
+DAEMON_COMMANDS = ['add', 'sync', 'list', 'remove', 'status', 'config', 'verify']
+
+
+def format_size(size):
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024 or unit == 'TB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+
+
+def print_plan(plan):
+    print(f"\nPlan for {plan['source']} -> {plan['destination']}:")
+    if not plan['operations']:
+        print("  Up to date, nothing to do")
+        return
+
+    counts = {}
+    for op in plan['operations']:
+        counts[op['action']] = counts.get(op['action'], 0) + 1
+        if op['action'] == 'move':
+            print(f"  move    {op['from']} -> {op['destination']} ({format_size(op['bytes'])})")
+        elif op['action'] == 'delete':
+            suffix = '/' if op['type'] == 'directory' else ''
+            print(f"  delete  {op['destination']}{suffix} ({format_size(op['bytes'])})")
+        else:
+            print(f"  {op['action']:<7} {op['source']} ({format_size(op['bytes'])})")
+
+    print("  " + ", ".join(f"{action}: {count}" for action, count in sorted(counts.items())))
+    print(f"  Data to transfer: {format_size(plan['transfer_bytes'])}")
+    if plan['estimated_seconds'] is not None:
+        print(f"  Estimated duration: {timedelta(seconds=round(plan['estimated_seconds']))} "
+              f"at {format_size(plan['throughput'])}/s")
+    else:
+        print("  Estimated duration: unknown (no throughput measured yet)")
+
+
+def print_verification(report):
+    print(f"\nVerification for {report['source']} -> {report['destination']}:")
+    print(f"  Checked: {report['checked']} of {report['total']} files")
+    print(f"  Pending sync: {report['pending']}")
+    for path in report['missing']:
+        print(f"  missing   {path}")
+    for path in report['mismatches']:
+        print(f"  corrupted {path}")
+    if report['repaired']:
+        print(f"  Repaired: {report['repaired']}")
+    if report['errors']:
+        print(f"  Errors: {report['errors']}")
+
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
+def positive_float(value):
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value}")
+    if not number > 0 or number == float('inf'):
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
+def create_synchronizer(config_manager):
+    # Imported on demand: lightweight commands such as list or config show
+    # never need the synchronizer
+    from folder_replicator.synchronization import Synchronizer
+    return Synchronizer(config_manager)
 
 
 def main():
-    config_manager = ConfigManager()
+    logger = None
+    sync = None
     parser = argparse.ArgumentParser(description='Folder Replication Tool')
     subparsers = parser.add_subparsers(dest='command', required=True)
     parser.add_argument('--verbose', action='store_true',
@@ -29,8 +107,12 @@ def main():
     add_parser.add_argument('destination', help='Destination directory path')
     add_parser.add_argument('--exclude', nargs='*',
                             default=[], help='File patterns to exclude (e.g., *.tmp cache/ *.pyc)')
+    add_parser.add_argument('--pipeline', choices=['sequential', 'async'], default='sequential',
+                            help='Sync pipeline; async keeps many operations in flight for network destinations')
 
     sync_parser = subparsers.add_parser('sync', help='Run synchronization')
+    sync_parser.add_argument('--json', action='store_true',
+                             help='Print the dry-run plan as JSON')
 
     watch_parser = subparsers.add_parser(
         'watch', help='Continuous monitoring mode')
@@ -38,6 +120,8 @@ def main():
                               default=60, help='Sync interval in minutes')
     watch_parser.add_argument('--daemon', '-d', action='store_true',
                               help='Run watch mode as a background process')
+    watch_parser.add_argument('--stop', action='store_true',
+                              help='Stop the running watch daemon')
 
     subparsers.add_parser('list', help='List all replications')
 
@@ -50,6 +134,17 @@ def main():
     status_parser.add_argument(
         'source_path', nargs='?', help='Specific source to check')
 
+    verify_parser = subparsers.add_parser(
+        'verify', help='Check destination integrity against stored digests')
+    verify_parser.add_argument(
+        'source_path', nargs='?', help='Specific source to verify')
+    verify_parser.add_argument('--sample', type=positive_int,
+                               help='Verify N randomly chosen files per replication')
+    verify_parser.add_argument('--rate', type=positive_float,
+                               help='Limit hashing to this many MB/s')
+    verify_parser.add_argument('--repair', action='store_true',
+                               help='Re-copy missing, corrupted or out of date files')
+
     logs_parser = subparsers.add_parser('logs', help='View logs')
     logs_parser.add_argument('--tail', type=int, help='Show last N lines')
     logs_parser.add_argument(
@@ -63,13 +158,14 @@ def main():
     config_set = config_subparsers.add_parser(
         'set', help='Set configuration value')
     config_set.add_argument(
-        'option', help='Option to set (sync_interval/log_level/max_log_size)')
+        'option', help='Option to set (sync_interval/log_level/max_log_size/hash_workers/'
+                       'verify_interval/verify_sample/verify_rate)')
     config_set.add_argument('value', help='Value to set')
 
     config_subparsers.add_parser(
         'show', help='Show current configuration')
 
-    for p in [add_parser, sync_parser, watch_parser, remove_parser, status_parser, logs_parser, config_set]:
+    for p in [add_parser, sync_parser, watch_parser, remove_parser, status_parser, verify_parser, logs_parser, config_set]:
         p.add_argument('--verbose', action='store_true', help='Verbose output')
         p.add_argument('--quiet', action='store_true', help='Only show errors')
         p.add_argument('--dry-run', action='store_true',
@@ -79,6 +175,7 @@ def main():
 
     try:
         if len(sys.argv) == 2 and (sys.argv[1] == '-v' or sys.argv[1] == '--version'):
+            import importlib.metadata
             try:
                 version = importlib.metadata.version('ext_folder_replicator')
                 print(f"ext_folder_replicator version {version}")
@@ -88,63 +185,135 @@ def main():
                 return 1
 
         args = parser.parse_args()
+        if args.command == 'sync' and args.json and not args.dry_run:
+            sync_parser.error("--json requires --dry-run")
 
+        config_manager = ConfigManager()
         logger = setup_logger(
-            config_manager, quiet=args.quiet, verbose=args.verbose)
-        config = ConfigManager()
-        sync = Synchronizer(config)
+            config_manager, quiet=args.quiet or getattr(args, 'json', False),
+            verbose=args.verbose)
+
+        # A running daemon owns the config file and keeps trees, watchers
+        # and status warm, so these commands are forwarded to it
+        client = None
+        if args.command in DAEMON_COMMANDS and not (args.command == 'sync' and args.dry_run):
+            client = DaemonClient.connect(config_manager)
+            if client:
+                logger.debug("Forwarding command to running daemon")
 
         if args.command == 'add':
             logger.info(
                 f"Adding replication: {args.source} -> {args.destination}")
-            if config.add_replication(args.source, args.destination, args.exclude):
+            if client:
+                try:
+                    added = client.call('add', source=str(Path(args.source).resolve()),
+                                        destination=str(
+                                            Path(args.destination).resolve()),
+                                        exclusions=args.exclude, pipeline=args.pipeline,
+                                        sync=not args.dry_run)
+                except RuntimeError as e:
+                    logger.error(f"Error adding replication: {e}")
+                    added = False
+            else:
+                added = config_manager.add_replication(
+                    args.source, args.destination, args.exclude, args.pipeline)
+                if added and not args.dry_run:
+                    sync = create_synchronizer(config_manager)
+                    sync.sync_replication(config_manager.get_replications()[-1])
+            if added:
                 logger.info("Successfully added replication")
-                if not args.dry_run:
-                    sync.sync_replication(config.get_replications()[-1])
             else:
                 logger.error("Failed to add replication")
 
         elif args.command == 'sync':
-            logger.info("Starting synchronization")
-            if not args.dry_run:
+            if args.dry_run:
+                logger.info("Planning synchronization (dry run)")
+                sync = create_synchronizer(config_manager)
+                plans = [sync.plan_replication(rep)
+                         for rep in config_manager.get_replications()]
+                if args.json:
+                    print(json.dumps(plans, indent=2))
+                else:
+                    for plan in plans:
+                        print_plan(plan)
+            elif client:
+                logger.info("Starting synchronization in daemon")
+                if not client.call('sync'):
+                    logger.error("Synchronization finished with errors")
+                    return 1
+            else:
+                logger.info("Starting synchronization")
+                sync = create_synchronizer(config_manager)
                 sync.sync_all()
 
         elif args.command == 'watch':
+            if args.stop:
+                client = DaemonClient.connect(config_manager)
+                if not client:
+                    logger.error("No running daemon found")
+                    return 1
+                client.call('shutdown')
+                logger.info("Daemon shutdown requested")
+                return 0
+
             logger.info(
                 f"Starting watch mode (interval: {args.interval} minutes)")
-            if args.daemon:
+            if args.daemon and os.name == 'posix':
+                from folder_replicator.service import run_daemon, running_daemon_pid
+                pid = running_daemon_pid(config_manager)
+                if pid is not None:
+                    logger.error(f"Daemon is already running (pid {pid})")
+                    return 1
+                logger.info("Running watch mode in the background")
+                run_daemon(config_manager, args.interval,
+                           quiet=args.quiet, verbose=args.verbose)
+            elif args.daemon:
                 import subprocess
                 logger.info("Running watch mode in the background")
                 subprocess.Popen([sys.executable, __file__, 'watch', '--interval', str(args.interval)],
                                  creationflags=subprocess.CREATE_NEW_CONSOLE)
             else:
                 if not args.dry_run:
-                    watcher = ReplicationWatcher(sync, args.interval)
+                    from folder_replicator.watcher import ReplicationWatcher
+                    watcher = ReplicationWatcher(
+                        create_synchronizer(config_manager), args.interval)
                     watcher.watch()
 
         elif args.command == 'list':
-            for rep in config.get_replications():
-                print(f"{rep['source']} -> {rep['destination']}")
+            replications = client.call(
+                'list') if client else config_manager.get_replications()
+            for rep in replications:
+                pipeline = ' [async]' if rep.get('pipeline') == 'async' else ''
+                print(f"{rep['source']} -> {rep['destination']}{pipeline}")
 
         elif args.command == 'remove':
             if args.force or input(f"Remove {args.source_path}? [y/N] ").lower() == 'y':
-                if config.remove_replication(args.source_path):
+                if client:
+                    removed = client.call(
+                        'remove', source_path=args.source_path)
+                else:
+                    removed = config_manager.remove_replication(
+                        args.source_path)
+                if removed:
                     logger.info("Replication removed")
                 else:
                     logger.error("Replication not found")
 
         elif args.command == 'status':
-            replications = config.get_replications()
+            if client:
+                statuses = client.call('status', source=args.source_path)
+            else:
+                sync = create_synchronizer(config_manager)
+                statuses = [[rep, sync.check_status(rep)] for rep in config_manager.get_replications()
+                            if not args.source_path or rep['source'] == args.source_path]
 
             if args.source_path:
-                rep = next(
-                    (r for r in replications if r['source'] == args.source_path), None)
-                if not rep:
+                if not statuses:
                     logger.error(
                         f"No replication found for: {args.source_path}")
                     return 1
 
-                status = sync.check_status(rep)
+                rep, status = statuses[0]
                 print(f"\nStatus for {rep['source']} -> {rep['destination']}:")
                 print(f"Last sync: {status.get('last_sync', 'Never')}")
                 print(f"Source files: {status.get('source_files', 0)}")
@@ -153,13 +322,12 @@ def main():
                 if status.get('errors'):
                     print(f"Errors: {status.get('errors', 0)}")
             else:
-                if not replications:
+                if not statuses:
                     print("No replications configured")
                     return
 
                 print("\nReplication Status Summary:")
-                for rep in replications:
-                    status = sync.check_status(rep)
+                for rep, status in statuses:
                     print(f"\n{rep['source']} -> {rep['destination']}")
                     print(f"  Last sync: {status.get('last_sync', 'Never')}")
                     print(
@@ -169,9 +337,45 @@ def main():
                     if status.get('errors'):
                         print(f"  Errors: {status.get('errors', 0)}")
 
+        elif args.command == 'verify':
+            source_path = str(Path(args.source_path).resolve()) if args.source_path else None
+            replications = [rep for rep in config_manager.get_replications()
+                            if not source_path or rep['source'] == source_path]
+            if not replications:
+                logger.error(f"No replication found for: {args.source_path}"
+                             if args.source_path else "No replications configured")
+                return 1
+
+            rate_limit = args.rate * 1024 * 1024 if args.rate else None
+            repair = args.repair and not args.dry_run
+            if client:
+                # Runs on the daemon's per-replication schedulers, so the
+                # scrub pauses for live changes instead of racing them
+                logger.info("Starting verification in daemon")
+                reports = client.call('verify', source=source_path, sample=args.sample,
+                                      rate_limit=rate_limit, repair=repair)
+            else:
+                from folder_replicator.verification import Verifier
+                sync = create_synchronizer(config_manager)
+                verifier = Verifier(sync, rate_limit=rate_limit)
+                reports = [verifier.verify_replication(rep, sample=args.sample, repair=repair)
+                           for rep in replications]
+
+            unresolved = 0
+            for report in reports:
+                print_verification(report)
+                # Files that could not be read are not verified, so they
+                # fail the scrub just like detected damage
+                unresolved += len(report['missing']) + len(report['mismatches']) + \
+                    report['pending'] + report['errors'] - report['repaired']
+            if unresolved:
+                return 1
+
         elif args.command == 'config':
             if args.config_command == 'set':
-                valid_options = ['sync_interval', 'log_level', 'max_log_size']
+                valid_options = ['sync_interval', 'log_level',
+                                 'max_log_size', 'hash_workers', 'verify_interval',
+                                 'verify_sample', 'verify_rate']
                 if args.option not in valid_options:
                     logger.error(
                         f"Invalid option. Must be one of: {', '.join(valid_options)}")
@@ -202,19 +406,59 @@ def main():
                             "Max log size must be a positive number (MB)")
                         return 1
 
-                if config_manager.set_config(args.option, args.value):
+                if args.option == 'hash_workers' and args.value.lower() != 'auto':
+                    try:
+                        args.value = int(args.value)
+                        if args.value < 0:
+                            raise ValueError
+                    except ValueError:
+                        logger.error(
+                            "Hash workers must be 'auto' or a non-negative integer (0 disables)")
+                        return 1
+
+                if args.option in ('verify_interval', 'verify_sample'):
+                    try:
+                        args.value = int(args.value)
+                        if args.value < 0:
+                            raise ValueError
+                    except ValueError:
+                        logger.error(
+                            f"{args.option} must be a non-negative integer (0 disables)")
+                        return 1
+
+                if args.option == 'verify_rate':
+                    try:
+                        args.value = float(args.value)
+                        if args.value < 0:
+                            raise ValueError
+                    except ValueError:
+                        logger.error(
+                            "Verify rate must be a non-negative number (MB/s, 0 is unlimited)")
+                        return 1
+
+                if client:
+                    updated = client.call(
+                        'config_set', option=args.option, value=args.value)
+                else:
+                    updated = config_manager.set_config(
+                        args.option, args.value)
+                if updated:
                     logger.info(
                         f"Configuration updated: {args.option} = {args.value}")
                 else:
                     logger.error("Failed to update configuration")
 
             elif args.config_command == 'show':
-                config = config_manager.get_config()
+                settings = config_manager.get_config()
                 print("\nCurrent Configuration:")
                 print(
-                    f"Sync interval: {config.get('sync_interval', 60)} minutes")
-                print(f"Log level: {config.get('log_level', 'INFO')}")
-                print(f"Max log size: {config.get('max_log_size', 10)} MB")
+                    f"Sync interval: {settings.get('sync_interval', 60)} minutes")
+                print(f"Log level: {settings.get('log_level', 'INFO')}")
+                print(f"Max log size: {settings.get('max_log_size', 10)} MB")
+                print(f"Hash workers: {settings.get('hash_workers', 0)}")
+                print(f"Verify interval: {settings.get('verify_interval', 0)} minutes")
+                print(f"Verify sample: {settings.get('verify_sample', 100)} files")
+                print(f"Verify rate: {settings.get('verify_rate', 10)} MB/s")
                 print(f"Log directory: {config_manager.get_log_dir()}")
 
         elif args.command == 'logs':
@@ -255,7 +499,16 @@ def main():
         else:
             print(f"Critical error before logger setup: {str(e)}")
         return 1
+    finally:
+        # Hash pool workers must be stopped before interpreter shutdown
+        # starts tearing down the executor's wakeup pipe
+        if sync:
+            sync.close()
 
 
 if __name__ == '__main__':
+    # The hash pool starts workers with spawn/forkserver, which re-enter
+    # this script when it is frozen into the PyInstaller executable
+    import multiprocessing
+    multiprocessing.freeze_support()
     sys.exit(main())
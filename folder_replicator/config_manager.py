@@ -6,6 +6,8 @@ import platform
 
 
 class ConfigManager:
+    THROUGHPUT_SMOOTHING = 0.3
+
     def __init__(self, config_file='replicator_config.json'):
         self.config_file = config_file
         self.config = self._load_config()
@@ -42,28 +44,33 @@ class ConfigManager:
             print(f"Error saving config: {e}")
             return False
 
-    def add_replication(self, source, destination, exclusions=None):
-        try:
-            source = str(Path(source).resolve())
-            destination = str(Path(destination).resolve())
+    def validate_replication(self, source, destination):
+        source = str(Path(source).resolve())
+        destination = str(Path(destination).resolve())
 
-            if not os.path.exists(source):
-                raise FileNotFoundError(
-                    f"Source folder does not exist: {source}")
+        if not os.path.exists(source):
+            raise FileNotFoundError(
+                f"Source folder does not exist: {source}")
 
-            for replication in self.config['replications']:
-                if replication['source'] == source:
-                    raise ValueError(
-                        f"Replication with the source already exists: {source} | use 'frep list' to see all replications")
-                if replication['source'] == destination and replication['destination'] == source:
-                    raise ValueError(
-                        f"Replication with destination as source and source as destination already exists: {destination} -> {source} | use 'frep list' to see all replications")
+        for replication in self.config['replications']:
+            if replication['source'] == source:
+                raise ValueError(
+                    f"Replication with the source already exists: {source} | use 'frep list' to see all replications")
+            if replication['source'] == destination and replication['destination'] == source:
+                raise ValueError(
+                    f"Replication with destination as source and source as destination already exists: {destination} -> {source} | use 'frep list' to see all replications")
+        return source, destination
+
+    def add_replication(self, source, destination, exclusions=None, pipeline='sequential'):
+        try:
+            source, destination = self.validate_replication(source, destination)
 
             replication = {
                 'source': source,
                 'destination': destination,
                 'last_sync': None,
-                'exclusions': exclusions or []
+                'exclusions': exclusions or [],
+                'pipeline': pipeline
             }
 
             self.config['replications'].append(replication)
@@ -75,11 +82,20 @@ class ConfigManager:
     def get_replications(self):
         return self.config.get('replications', [])
 
-    def update_last_sync(self, replication_index, timestamp):
+    def update_last_sync(self, replication_index, timestamp, throughput=None):
         try:
             if 0 <= replication_index < len(self.config['replications']):
-                self.config['replications'][replication_index]['last_sync'] = datetime.fromtimestamp(
+                replication = self.config['replications'][replication_index]
+                replication['last_sync'] = datetime.fromtimestamp(
                     timestamp).strftime('%Y-%m-%d %H:%M:%S')
+                if throughput:
+                    # Smoothed so one unusually fast or slow sync does not
+                    # swing the dry-run estimate
+                    previous = replication.get('throughput')
+                    if previous:
+                        throughput = (self.THROUGHPUT_SMOOTHING * throughput +
+                                      (1 - self.THROUGHPUT_SMOOTHING) * previous)
+                    replication['throughput'] = round(throughput)
                 return self.save_config()
             return False
         except Exception as e:
@@ -90,7 +106,11 @@ class ConfigManager:
         settings = {
             'sync_interval': self.config.get('sync_interval'),
             'log_level': self.config.get('log_level'),
-            'max_log_size': self.config.get('max_log_size')
+            'max_log_size': self.config.get('max_log_size'),
+            'hash_workers': self.config.get('hash_workers'),
+            'verify_interval': self.config.get('verify_interval'),
+            'verify_sample': self.config.get('verify_sample'),
+            'verify_rate': self.config.get('verify_rate')
         }
 
         self.config['replications'] = [r for r in self.config['replications']
@@ -105,7 +125,9 @@ class ConfigManager:
         if not hasattr(self, 'config'):
             self.config = {}
 
-        valid_options = ['sync_interval', 'log_level', 'max_log_size']
+        valid_options = ['sync_interval', 'log_level',
+                         'max_log_size', 'hash_workers', 'verify_interval',
+                         'verify_sample', 'verify_rate']
         if option not in valid_options:
             return False
 
@@ -130,6 +152,33 @@ class ConfigManager:
             except ValueError:
                 return False
 
+        elif option == 'hash_workers':
+            if str(value).lower() == 'auto':
+                value = 'auto'
+            else:
+                try:
+                    value = int(value)
+                    if value < 0:
+                        return False
+                except ValueError:
+                    return False
+
+        elif option in ('verify_interval', 'verify_sample'):
+            try:
+                value = int(value)
+                if value < 0:
+                    return False
+            except ValueError:
+                return False
+
+        elif option == 'verify_rate':
+            try:
+                value = float(value)
+                if value < 0:
+                    return False
+            except ValueError:
+                return False
+
         self.config[option] = value
         return self.save_config()
 
@@ -137,7 +186,11 @@ class ConfigManager:
         return {
             'sync_interval': self.config.get('sync_interval', 60),
             'log_level': self.config.get('log_level', 'INFO'),
-            'max_log_size': self.config.get('max_log_size', 10)
+            'max_log_size': self.config.get('max_log_size', 10),
+            'hash_workers': self.config.get('hash_workers', 0),
+            'verify_interval': self.config.get('verify_interval', 0),
+            'verify_sample': self.config.get('verify_sample', 100),
+            'verify_rate': self.config.get('verify_rate', 10)
         }
 
     def get_log_dir(self):
@@ -147,3 +200,9 @@ class ConfigManager:
         log_dir = self.get_log_dir()
         current_date = datetime.now().strftime("%Y-%m-%d")
         return log_dir / f"folder_replicator_{current_date}.log"
+
+    def get_socket_path(self):
+        return self.get_log_dir() / "frepd.sock"
+
+    def get_pid_file(self):
+        return self.get_log_dir() / "frepd.pid"
@@ -1,13 +1,27 @@
 import os
+import errno
 import shutil
-import hashlib
 
 
 class FileOperations:
+    COPY_CHUNK_SIZE = 1024 * 1024
+    PREALLOCATE_THRESHOLD = 64 * 1024 * 1024
+
     @staticmethod
     def safe_copy(src, dest):
         try:
-            shutil.copy2(src, dest)
+            st = os.stat(src)
+            # shutil.copy2 refuses to copy a file onto itself; the manual
+            # copies below would truncate it to zeros instead
+            if os.path.exists(dest) and os.path.samefile(src, dest):
+                raise shutil.SameFileError(
+                    f"{src!r} and {dest!r} are the same file")
+            if FileOperations._is_sparse(st):
+                FileOperations._sparse_copy(src, dest, st.st_size)
+            elif st.st_size >= FileOperations.PREALLOCATE_THRESHOLD and hasattr(os, 'posix_fallocate'):
+                FileOperations._preallocated_copy(src, dest, st.st_size)
+            else:
+                shutil.copy2(src, dest)
             return True
         except PermissionError:
             print(f"Permission denied on: {src}")
@@ -18,15 +32,21 @@ class FileOperations:
     @staticmethod
     def files_identical(file1, file2):
         try:
-            if os.path.getsize(file1) != os.path.getsize(file2):
+            st1 = os.stat(file1)
+            st2 = os.stat(file2)
+            if st1.st_size != st2.st_size:
                 return False
 
+            if FileOperations._is_sparse(st1) or FileOperations._is_sparse(st2):
+                return FileOperations._sparse_identical(file1, file2, st1.st_size)
+
             return FileOperations.file_hash(file1) == FileOperations.file_hash(file2)
         except:
             return False
 
     @staticmethod
     def file_hash(filepath):
+        import hashlib
         hasher = hashlib.md5()
         try:
             with open(filepath, 'rb') as f:
@@ -47,3 +67,85 @@ class FileOperations:
         except Exception as e:
             print(f"Error creating directory {path}: {e}")
             return False
+
+    @staticmethod
+    def _is_sparse(st):
+        if not hasattr(os, 'SEEK_DATA') or not hasattr(st, 'st_blocks'):
+            return False
+        return st.st_blocks * 512 < st.st_size
+
+    @staticmethod
+    def _data_segments(fd, size):
+        segments = []
+        offset = 0
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                # ENXIO means there is no data past offset, only a trailing hole
+                if e.errno == errno.ENXIO:
+                    break
+                raise
+            end = os.lseek(fd, start, os.SEEK_HOLE)
+            segments.append((start, end))
+            offset = end
+        return segments
+
+    @staticmethod
+    def _copy_segment(fsrc, fdst, start, end):
+        fsrc.seek(start)
+        fdst.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = fsrc.read(min(FileOperations.COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            fdst.write(chunk)
+            remaining -= len(chunk)
+
+    @staticmethod
+    def _sparse_copy(src, dest, size):
+        with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+            for start, end in FileOperations._data_segments(fsrc.fileno(), size):
+                FileOperations._copy_segment(fsrc, fdst, start, end)
+            # Seeking past the last data segment leaves holes; truncate
+            # fixes up the length when the file ends in one
+            fdst.truncate(size)
+        shutil.copystat(src, dest)
+
+    @staticmethod
+    def _preallocated_copy(src, dest, size):
+        with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+            try:
+                os.posix_fallocate(fdst.fileno(), 0, size)
+            except OSError:
+                pass
+            FileOperations._copy_segment(fsrc, fdst, 0, size)
+            fdst.truncate(size)
+        shutil.copystat(src, dest)
+
+    @staticmethod
+    def _sparse_identical(file1, file2, size):
+        with open(file1, 'rb') as f1, open(file2, 'rb') as f2:
+            segments = sorted(FileOperations._data_segments(f1.fileno(), size) +
+                              FileOperations._data_segments(f2.fileno(), size))
+
+            # Only ranges holding data in either file need reading, holes
+            # shared by both read back as zeros on each side
+            merged = []
+            for start, end in segments:
+                if merged and start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+
+            for start, end in merged:
+                f1.seek(start)
+                f2.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    length = min(FileOperations.COPY_CHUNK_SIZE, remaining)
+                    if f1.read(length) != f2.read(length):
+                        return False
+                    remaining -= length
+        return True
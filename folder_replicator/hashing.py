@@ -0,0 +1,48 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from folder_replicator.file_operations import FileOperations
+
+
+class HashPool:
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            # The pool is started from watcher and RPC threads; forking there
+            # can hand a child a lock held by another thread (logging, etc.)
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+            else:
+                context = multiprocessing.get_context('spawn')
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    def hash_files(self, paths):
+        # Workers receive paths and send back hex digests only, so no file
+        # data crosses the process boundary
+        paths = list(paths)
+        if not paths:
+            return {}
+        chunksize = max(1, len(paths) // (self.workers * 4))
+        with self._lock:
+            # A sync still holding a pool that was replaced by a config
+            # change finishes its work inline rather than restarting it
+            if self._closed:
+                return {path: FileOperations.file_hash(path) for path in paths}
+            digests = self._get_executor().map(
+                FileOperations.file_hash, paths, chunksize=chunksize)
+        return dict(zip(paths, digests))
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
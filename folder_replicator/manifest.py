@@ -0,0 +1,55 @@
+import json
+import os
+import hashlib
+
+
+class Manifest:
+    def __init__(self, path):
+        self.path = str(path)
+        self.entries = self._load()
+
+    @classmethod
+    def for_replication(cls, config_manager, replication):
+        key = hashlib.md5(replication['destination'].encode('utf-8')).hexdigest()
+        manifest_dir = config_manager.get_log_dir() / "manifests"
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+        return cls(manifest_dir / f"{key}.json")
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error loading manifest {self.path}: {e}")
+        return {}
+
+    def save(self):
+        # Written to a temporary file first so an interrupted save never
+        # leaves a truncated manifest behind
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"Error saving manifest {self.path}: {e}")
+            return False
+
+    def lookup(self, rel_path, st):
+        entry = self.entries.get(rel_path)
+        if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+            return entry['digest']
+        return None
+
+    def record(self, rel_path, st, digest):
+        self.entries[rel_path] = {
+            'digest': digest,
+            'size': st.st_size,
+            'mtime': st.st_mtime
+        }
+
+    def prune(self, rel_paths):
+        keep = set(rel_paths)
+        self.entries = {k: v for k, v in self.entries.items() if k in keep}
@@ -0,0 +1,57 @@
+import json
+import os
+import socket
+
+
+def send_message(stream, message):
+    stream.write(json.dumps(message).encode('utf-8') + b'\n')
+    stream.flush()
+
+
+def read_message(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Connection closed by peer")
+    return json.loads(line.decode('utf-8'))
+
+
+class DaemonClient:
+    CONNECT_TIMEOUT = 0.5
+
+    def __init__(self, socket_path, config_file):
+        self.socket_path = str(socket_path)
+        self.config_file = os.path.abspath(config_file)
+
+    @classmethod
+    def connect(cls, config_manager):
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        socket_path = config_manager.get_socket_path()
+        if not os.path.exists(socket_path):
+            return None
+
+        client = cls(socket_path, config_manager.config_file)
+        try:
+            client.call('ping')
+        except (OSError, RuntimeError, ValueError):
+            # Stale socket, or a daemon serving another config file
+            return None
+        return client
+
+    def call(self, command, **params):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.CONNECT_TIMEOUT)
+            sock.connect(self.socket_path)
+            # Commands such as sync run for as long as the work takes
+            sock.settimeout(None)
+            with sock.makefile('rwb') as stream:
+                send_message(stream, {
+                    'command': command,
+                    'config': self.config_file,
+                    'params': params
+                })
+                response = read_message(stream)
+
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', 'Unknown daemon error'))
+        return response.get('result')
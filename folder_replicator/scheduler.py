@@ -0,0 +1,127 @@
+import time
+import threading
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger("FolderReplicator")
+
+
+class ReplicationScheduler:
+    # All work for one replication runs on this scheduler's thread, so live
+    # events and reconciliation never copy the same file at the same time
+    def __init__(self, synchronizer, replication, settle_interval=0.5, max_delay=2):
+        self.synchronizer = synchronizer
+        self.replication = replication
+        self.settle_interval = settle_interval
+        self.max_delay = max_delay
+        self._events = set()
+        self._first_event_time = None
+        self._last_event_time = None
+        self._reconcile = None
+        self._jobs = []
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            if self._reconcile is not None:
+                self._reconcile.cancel()
+                self._reconcile = None
+            for future, _ in self._jobs:
+                future.cancel()
+            self._jobs = []
+            self._condition.notify()
+
+    def submit_event(self, *paths):
+        now = time.time()
+        with self._condition:
+            if not self._events:
+                self._first_event_time = now
+            self._events.update(paths)
+            self._last_event_time = now
+            self._condition.notify()
+
+    def request_reconcile(self):
+        with self._condition:
+            if self._reconcile is None:
+                self._reconcile = Future()
+            self._condition.notify()
+            return self._reconcile
+
+    def submit_job(self, job):
+        # Other work on the replication, such as an integrity scrub, is
+        # called with the same yield_to hook as reconciliation
+        future = Future()
+        with self._condition:
+            self._jobs.append((future, job))
+            self._condition.notify()
+        return future
+
+    def _take_events(self):
+        # Bursts are batched until they go quiet for settle_interval, but a
+        # continuous stream is still flushed every max_delay seconds
+        if not self._events:
+            return []
+        now = time.time()
+        if (now - self._last_event_time < self.settle_interval and
+                now - self._first_event_time < self.max_delay):
+            return []
+        paths = sorted(self._events)
+        self._events.clear()
+        return paths
+
+    def _next_wait(self):
+        if not self._events:
+            return None
+        now = time.time()
+        return max(0.01, min(self._last_event_time + self.settle_interval,
+                             self._first_event_time + self.max_delay) - now)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopped:
+                        return
+                    paths = self._take_events()
+                    reconcile = job = None
+                    if paths:
+                        break
+                    if self._reconcile is not None:
+                        reconcile = self._reconcile
+                        self._reconcile = None
+                        break
+                    if self._jobs:
+                        job = self._jobs.pop(0)
+                        break
+                    self._condition.wait(self._next_wait())
+
+            if paths:
+                self.synchronizer.sync_paths(self.replication, paths)
+            elif reconcile is not None:
+                if reconcile.set_running_or_notify_cancel():
+                    result = self.synchronizer.sync_replication(
+                        self.replication, yield_to=self._yield_to_events)
+                    reconcile.set_result(result)
+            else:
+                future, run = job
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(run(self._yield_to_events))
+                    except Exception as e:
+                        logger.error(f"Scheduled job failed: {str(e)}", exc_info=True)
+                        future.set_exception(e)
+
+    def _yield_to_events(self):
+        with self._condition:
+            paths = self._take_events()
+        if paths:
+            logger.debug(
+                f"Pausing reconciliation for {len(paths)} live change(s)")
+            self.synchronizer.sync_paths(self.replication, paths)
@@ -0,0 +1,190 @@
+import os
+import logging
+import socketserver
+import threading
+import daemon
+import daemon.pidfile
+from folder_replicator.logger import setup_logger
+from folder_replicator.rpc import send_message, read_message
+from folder_replicator.synchronization import Synchronizer
+from folder_replicator.watcher import ReplicationWatcher
+
+logger = logging.getLogger("FolderReplicator")
+
+
+class RPCHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = read_message(self.rfile)
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Invalid daemon request: {e}")
+            return
+
+        try:
+            result = self.server.service.handle_request(request)
+            response = {'ok': True, 'result': result}
+        except Exception as e:
+            logger.error(f"Daemon request failed: {str(e)}", exc_info=True)
+            response = {'ok': False, 'error': str(e)}
+        send_message(self.wfile, response)
+
+
+class RPCServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ReplicationService:
+    def __init__(self, config_manager, interval_minutes=60, quiet=False, verbose=False):
+        self.config_manager = config_manager
+        self.quiet = quiet
+        self.verbose = verbose
+        self.config_file = os.path.abspath(config_manager.config_file)
+        self.synchronizer = Synchronizer(config_manager)
+        self.watcher = ReplicationWatcher(self.synchronizer, interval_minutes)
+        self.server = None
+        self._lock = threading.Lock()
+
+    def serve(self, socket_path):
+        socket_path = str(socket_path)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        self.server = RPCServer(socket_path, RPCHandler)
+        self.server.service = self
+        os.chmod(socket_path, 0o600)
+        try:
+            self.watcher.start()
+            logger.info(f"Daemon listening on {socket_path}")
+            self.server.serve_forever()
+        finally:
+            self.watcher.stop()
+            self.server.server_close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            logger.info("Daemon stopped")
+
+    def handle_request(self, request):
+        if request.get('config') != self.config_file:
+            raise ValueError(
+                f"Daemon serves {self.config_file}, not {request.get('config')}")
+
+        handler = getattr(self, f"rpc_{request.get('command')}", None)
+        if handler is None:
+            raise ValueError(f"Unknown command: {request.get('command')}")
+        return handler(**request.get('params', {}))
+
+    def rpc_ping(self):
+        return {'pid': os.getpid()}
+
+    def rpc_list(self):
+        return self.config_manager.get_replications()
+
+    def rpc_status(self, source=None):
+        replications = self.config_manager.get_replications()
+        if source is not None:
+            replications = [r for r in replications if r['source'] == source]
+        return [[rep, self.synchronizer.check_status(rep)] for rep in replications]
+
+    def rpc_sync(self):
+        futures = [self.watcher.request_sync(rep)
+                   for rep in self.config_manager.get_replications()]
+        return all([future.result() for future in futures])
+
+    def rpc_verify(self, source=None, sample=None, rate_limit=None, repair=False):
+        replications = self.config_manager.get_replications()
+        if source is not None:
+            replications = [r for r in replications if r['source'] == source]
+        futures = [self.watcher.request_verify(rep, sample, rate_limit, repair)
+                   for rep in replications]
+        return [future.result() for future in futures]
+
+    def rpc_add(self, source, destination, exclusions=None, pipeline='sequential', sync=True):
+        with self._lock:
+            # add_replication only prints why it failed, which is lost in
+            # the detached daemon; raising sends the reason to the client
+            self.config_manager.validate_replication(source, destination)
+            if not self.config_manager.add_replication(source, destination, exclusions, pipeline):
+                return False
+            replication = self.config_manager.get_replications()[-1]
+            self.watcher.watch_replication(replication)
+        if sync:
+            self.watcher.request_sync(replication).result()
+        return True
+
+    def rpc_remove(self, source_path):
+        with self._lock:
+            self.watcher.unwatch_replication(source_path)
+            return self.config_manager.remove_replication(source_path)
+
+    def rpc_config_set(self, option, value):
+        with self._lock:
+            if not self.config_manager.set_config(option, value):
+                return False
+            # Both are read once at startup, so apply them to the running
+            # daemon instead of waiting for a restart
+            if option == 'hash_workers':
+                self.synchronizer.reload_hash_pool()
+            elif option == 'log_level':
+                setup_logger(self.config_manager,
+                             quiet=self.quiet, verbose=self.verbose)
+            logger.info(f"Configuration updated: {option} = {value}")
+            return True
+
+    def rpc_shutdown(self):
+        # shutdown() waits for serve_forever to return, which cannot happen
+        # while this request is still being handled
+        threading.Thread(target=self.server.shutdown).start()
+        return True
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    # A killed daemon lingers as a zombie until its parent reaps it, and
+    # signal 0 still succeeds for it
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except (OSError, IndexError):
+        return True
+
+
+def running_daemon_pid(config_manager):
+    pidfile = daemon.pidfile.TimeoutPIDLockFile(
+        str(config_manager.get_pid_file()), acquire_timeout=0)
+    pid = pidfile.read_pid()
+    if pid is not None and _process_alive(pid):
+        return pid
+
+    # Left behind by a daemon that was killed without cleaning up; the
+    # lock would otherwise make the detached child exit silently
+    if pidfile.is_locked():
+        logger.info(f"Removing stale daemon pid file: {pidfile.path}")
+        pidfile.break_lock()
+    socket_path = config_manager.get_socket_path()
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    return None
+
+
+def run_daemon(config_manager, interval_minutes, quiet=False, verbose=False):
+    context = daemon.DaemonContext(
+        working_directory=os.getcwd(),
+        umask=0o022,
+        # python-daemon skips the fork when stdin is a socket or the parent
+        # is init (inetd/systemd style); --daemon must always detach
+        detach_process=True,
+        pidfile=daemon.pidfile.TimeoutPIDLockFile(
+            str(config_manager.get_pid_file()), acquire_timeout=0),
+    )
+    with context:
+        # The log file handle opened before forking is closed by the
+        # daemon context, so logging is set up again on the detached side
+        setup_logger(config_manager, quiet=quiet, verbose=verbose)
+        service = ReplicationService(
+            config_manager, interval_minutes, quiet=quiet, verbose=verbose)
+        service.serve(config_manager.get_socket_path())
@@ -8,14 +8,54 @@ logger = logging.getLogger("FolderReplicator")
 
 
 class Synchronizer:
+    HASH_BATCH_SIZE = 64
+    # Below this, per-file overhead dominates and the rate says little
+    # about how long a large plan will take
+    THROUGHPUT_MIN_BYTES = 8 * 1024 * 1024
+    # The watcher invalidates cached status on changes it sees; the TTL
+    # covers destinations whose changes raise no events (network mounts)
+    STATUS_CACHE_TTL = 300
+
     def __init__(self, config_manager):
         self.config_manager = config_manager
+        self._hash_pool = None
+        self._hash_pool_loaded = False
+        self.status_cache = {}
+
+    @property
+    def hash_pool(self):
+        # Created on first use so commands that never compare files, such
+        # as status, do not import multiprocessing
+        if not self._hash_pool_loaded:
+            self._hash_pool = self._create_hash_pool()
+            self._hash_pool_loaded = True
+        return self._hash_pool
+
+    def _create_hash_pool(self):
+        hash_workers = self.config_manager.get_config().get('hash_workers', 0)
+        if not hash_workers:
+            return None
+        from folder_replicator.hashing import HashPool
+        if hash_workers == 'auto':
+            return HashPool()
+        return HashPool(hash_workers)
+
+    def reload_hash_pool(self):
+        old_pool = self._hash_pool
+        self._hash_pool = None
+        self._hash_pool_loaded = False
+        if old_pool is not None:
+            old_pool.shutdown()
+
+    def close(self):
+        if self._hash_pool is not None:
+            self._hash_pool.shutdown()
 
     def sync_all(self):
         for replication in self.config_manager.get_replications():
             self.sync_replication(replication)
 
-    def sync_replication(self, replication):
+    def sync_replication(self, replication, yield_to=None):
         try:
             source = replication['source']
             destination = replication['destination']
@@ -24,65 +64,38 @@ class Synchronizer:
             logger.debug(f"Starting sync with exclusions: {exclusions}")
             logger.info(f"Starting synchronization: {source} -> {destination}")
             start_time = time.time()
-            stats = {'copied': 0, 'skipped': 0, 'removed': 0, 'errors': 0}
+            stats = {'copied': 0, 'skipped': 0, 'removed': 0, 'errors': 0,
+                     'bytes': 0, 'copy_time': 0.0}
 
             if not FileOperations.ensure_directory_exists(destination):
                 logger.error(
                     f"Failed to create destination directory: {destination}")
                 return False
 
-            for root, dirs, files in os.walk(source):
-                logger.debug(f"Processing directory: {root}")
-                logger.debug(
-                    f"Found {len(files)} files and {len(dirs)} subdirectories")
-
-                dirs[:] = [d for d in dirs if not self._is_excluded(
-                    os.path.join(root, d), exclusions)]
-                rel_path = os.path.relpath(root, source)
-                dest_dir = os.path.join(destination, rel_path)
-                if not FileOperations.ensure_directory_exists(dest_dir):
-                    stats['errors'] += 1
-                    logger.warning(f"Failed to create directory: {dest_dir}")
-                    continue
-
-                for file in files:
-                    src_file = os.path.join(root, file)
-                    dest_file = os.path.join(dest_dir, file)
-                    logger.debug(f"Processing file: {src_file}")
-
-                    if self._is_excluded(src_file, exclusions):
-                        logger.debug(f"Skipping excluded file: {src_file}")
-                        stats['skipped'] += 1
-                        continue
-
-                    if os.path.exists(dest_file):
-                        if FileOperations.files_identical(src_file, dest_file):
-                            logger.debug(
-                                f"Files identical, skipping: {src_file}")
-                            stats['skipped'] += 1
-                            continue
-                        else:
-                            logger.debug(
-                                f"Files different, updating: {src_file}")
-
-                    if FileOperations.safe_copy(src_file, dest_file):
-                        stats['copied'] += 1
-                        logger.info(f"Copied: {src_file} -> {dest_file}")
-                    else:
-                        stats['errors'] += 1
-                        logger.warning(f"Failed to copy: {src_file}")
+            if replication.get('pipeline') == 'async':
+                from folder_replicator.async_pipeline import AsyncPipeline
+                AsyncPipeline(self).run(source, destination, exclusions, stats)
+            else:
+                self._sync_files(source, destination,
+                                 exclusions, stats, yield_to)
 
             del_stats = self._cleanup_deleted_items(
-                source, destination, exclusions)
+                source, destination, exclusions, yield_to)
             if del_stats:
                 stats['removed'] += del_stats.get('removed', 0)
                 stats['errors'] += del_stats.get('errors', 0)
 
+            throughput = None
+            if stats['bytes'] >= self.THROUGHPUT_MIN_BYTES and stats['copy_time'] > 0:
+                throughput = stats['bytes'] / stats['copy_time']
             self.config_manager.update_last_sync(
                 self.config_manager.get_replications().index(replication),
-                time.time()
+                time.time(),
+                throughput
             )
 
+            self.invalidate_status(replication)
+
             elapsed = time.time() - start_time
             logger.debug(f"Sync completed in {elapsed:.2f} seconds")
             logger.info("Synchronization statistics: " +
@@ -94,15 +107,289 @@ class Synchronizer:
             return True
 
         except Exception as e:
+            self.invalidate_status(replication)
             logger.error(
                 f"Error during synchronization: {str(e)}", exc_info=True)
             return False
 
+    def sync_paths(self, replication, paths):
+        source = replication['source']
+        destination = replication['destination']
+        exclusions = replication.get('exclusions', [])
+        stats = {'copied': 0, 'skipped': 0, 'removed': 0, 'errors': 0,
+                 'bytes': 0, 'copy_time': 0.0}
+
+        for path in paths:
+            try:
+                rel_path = os.path.relpath(path, source)
+                if (rel_path == os.curdir or rel_path == os.pardir or
+                        rel_path.startswith(os.pardir + os.sep)):
+                    continue
+                if self._is_excluded(path, exclusions):
+                    logger.debug(f"Skipping excluded path: {path}")
+                    continue
+                dest_path = os.path.join(destination, rel_path)
+
+                if os.path.isdir(path):
+                    self._sync_files(path, dest_path, exclusions, stats)
+                elif os.path.isfile(path):
+                    if not FileOperations.ensure_directory_exists(os.path.dirname(dest_path)):
+                        stats['errors'] += 1
+                        logger.warning(
+                            f"Failed to create directory: {os.path.dirname(dest_path)}")
+                    elif os.path.exists(dest_path) and FileOperations.files_identical(path, dest_path):
+                        stats['skipped'] += 1
+                    else:
+                        self._copy_file(path, dest_path, stats)
+                elif os.path.isdir(dest_path):
+                    shutil.rmtree(dest_path)
+                    stats['removed'] += 1
+                    logger.info(
+                        f"Removed directory: {dest_path} (source deleted)")
+                elif os.path.exists(dest_path):
+                    os.remove(dest_path)
+                    stats['removed'] += 1
+                    logger.info(f"Removed: {dest_path} (source deleted)")
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error syncing {path}: {e}")
+
+        if replication in self.config_manager.get_replications():
+            self.config_manager.update_last_sync(
+                self.config_manager.get_replications().index(replication),
+                time.time()
+            )
+        self.invalidate_status(replication)
+        logger.info("Change synchronization statistics: " +
+                    f"Copied: {stats['copied']}, " +
+                    f"Skipped: {stats['skipped']}, " +
+                    f"Removed: {stats['removed']}, " +
+                    f"Errors: {stats['errors']}")
+        return stats['errors'] == 0
+
+    def _sync_files(self, source, destination, exclusions, stats, yield_to=None):
+        pending = []
+        for root, dirs, files in os.walk(source):
+            logger.debug(f"Processing directory: {root}")
+            logger.debug(
+                f"Found {len(files)} files and {len(dirs)} subdirectories")
+
+            dirs[:] = [d for d in dirs if not self._is_excluded(
+                os.path.join(root, d), exclusions)]
+            rel_path = os.path.relpath(root, source)
+            dest_dir = os.path.join(destination, rel_path)
+            if not FileOperations.ensure_directory_exists(dest_dir):
+                stats['errors'] += 1
+                logger.warning(f"Failed to create directory: {dest_dir}")
+                continue
+
+            for file in files:
+                if yield_to:
+                    yield_to()
+                src_file = os.path.join(root, file)
+                dest_file = os.path.join(dest_dir, file)
+                logger.debug(f"Processing file: {src_file}")
+
+                if self._is_excluded(src_file, exclusions):
+                    logger.debug(f"Skipping excluded file: {src_file}")
+                    stats['skipped'] += 1
+                    continue
+
+                if os.path.exists(dest_file):
+                    pending.append((src_file, dest_file))
+                    continue
+
+                self._copy_file(src_file, dest_file, stats)
+
+        for src_file, dest_file, identical in self._compare_files(pending, yield_to):
+            if yield_to:
+                yield_to()
+            if identical:
+                logger.debug(f"Files identical, skipping: {src_file}")
+                stats['skipped'] += 1
+                continue
+            logger.debug(f"Files different, updating: {src_file}")
+            self._copy_file(src_file, dest_file, stats)
+
+    def plan_replication(self, replication):
+        source = replication['source']
+        destination = replication['destination']
+        exclusions = replication.get('exclusions', [])
+
+        copies = []
+        updates = []
+        pending = []
+        for root, dirs, files in os.walk(source):
+            dirs[:] = [d for d in dirs if not self._is_excluded(
+                os.path.join(root, d), exclusions)]
+            dest_dir = os.path.normpath(
+                os.path.join(destination, os.path.relpath(root, source)))
+
+            for file in files:
+                src_file = os.path.join(root, file)
+                dest_file = os.path.join(dest_dir, file)
+                if self._is_excluded(src_file, exclusions):
+                    continue
+                if os.path.exists(dest_file):
+                    pending.append((src_file, dest_file))
+                    continue
+                copies.append(self._plan_operation(
+                    'copy', src_file, dest_file, os.path.getsize(src_file)))
+
+        for src_file, dest_file, identical in self._compare_files(pending):
+            if not identical:
+                updates.append(self._plan_operation(
+                    'update', src_file, dest_file, os.path.getsize(src_file)))
+
+        deletes = self._plan_deletions(source, destination, exclusions)
+        self._match_moves(copies, deletes)
+
+        operations = copies + updates + deletes
+        # Moves are still carried out as copy + delete, so they cost a full
+        # transfer; deletes only touch metadata
+        transfer_bytes = sum(op['bytes'] for op in operations
+                             if op['action'] != 'delete')
+        throughput = replication.get('throughput')
+        return {
+            'source': source,
+            'destination': destination,
+            'operations': operations,
+            'transfer_bytes': transfer_bytes,
+            'throughput': throughput,
+            'estimated_seconds': transfer_bytes / throughput if throughput else None
+        }
+
+    def _plan_operation(self, action, src_path, dest_path, size, kind='file'):
+        return {'action': action, 'type': kind, 'source': src_path,
+                'destination': dest_path, 'bytes': size}
+
+    def _plan_deletions(self, source, destination, exclusions):
+        deletes = []
+        if not os.path.exists(destination):
+            return deletes
+
+        for root, dirs, files in os.walk(destination):
+            dirs[:] = [d for d in dirs if not self._is_excluded(
+                os.path.join(root, d), exclusions)]
+            src_dir = os.path.normpath(
+                os.path.join(source, os.path.relpath(root, destination)))
+
+            for file in files:
+                dest_file = os.path.join(root, file)
+                if self._is_excluded(dest_file, exclusions):
+                    continue
+                if not os.path.exists(os.path.join(src_dir, file)):
+                    deletes.append(self._plan_operation(
+                        'delete', None, dest_file, os.path.getsize(dest_file)))
+
+            removed_dirs = [d for d in dirs
+                            if not os.path.exists(os.path.join(src_dir, d))]
+            for dir in removed_dirs:
+                dest_dir_path = os.path.join(root, dir)
+                deletes.append(self._plan_operation(
+                    'delete', None, dest_dir_path,
+                    self._tree_size(dest_dir_path), kind='directory'))
+            dirs[:] = [d for d in dirs if d not in removed_dirs]
+        return deletes
+
+    def _match_moves(self, copies, deletes):
+        by_size = {}
+        for op in deletes:
+            if op['type'] == 'file' and op['bytes']:
+                by_size.setdefault(op['bytes'], []).append(op)
+        candidates = [op for op in copies if op['bytes'] in by_size]
+        if not candidates:
+            return
+
+        paths = [op['source'] for op in candidates]
+        paths += [d['destination'] for op in candidates
+                  for d in by_size[op['bytes']]]
+        paths = list(dict.fromkeys(paths))
+        hash_pool = self.hash_pool
+        if hash_pool is not None:
+            digests = hash_pool.hash_files(paths)
+        else:
+            digests = {path: FileOperations.file_hash(path) for path in paths}
+
+        for op in candidates:
+            digest = digests.get(op['source'])
+            if digest is None:
+                continue
+            for deleted in by_size[op['bytes']]:
+                if digests.get(deleted['destination']) == digest:
+                    op['action'] = 'move'
+                    op['from'] = deleted['destination']
+                    by_size[op['bytes']].remove(deleted)
+                    deletes.remove(deleted)
+                    break
+
+    def _tree_size(self, path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for file in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    pass
+        return total
+
+    def _copy_file(self, src_file, dest_file, stats):
+        copy_start = time.time()
+        if FileOperations.safe_copy(src_file, dest_file):
+            stats['copy_time'] += time.time() - copy_start
+            stats['bytes'] += os.path.getsize(dest_file)
+            stats['copied'] += 1
+            logger.info(f"Copied: {src_file} -> {dest_file}")
+        else:
+            stats['errors'] += 1
+            logger.warning(f"Failed to copy: {src_file}")
+
+    def _compare_files(self, pairs, yield_to=None):
+        # Held locally so a pool swapped by a config change mid-sync is
+        # still used consistently for this run
+        hash_pool = self.hash_pool
+        if hash_pool is None:
+            for src_file, dest_file in pairs:
+                yield src_file, dest_file, FileOperations.files_identical(src_file, dest_file)
+            return
+
+        same_size = []
+        for src_file, dest_file in pairs:
+            try:
+                src_stat = os.stat(src_file)
+                dest_stat = os.stat(dest_file)
+            except OSError:
+                yield src_file, dest_file, False
+                continue
+            if src_stat.st_size != dest_stat.st_size:
+                yield src_file, dest_file, False
+            elif FileOperations._is_sparse(src_stat) or FileOperations._is_sparse(dest_stat):
+                # Hashing would read the holes in full; the sparse-aware
+                # comparison only reads the data ranges
+                yield src_file, dest_file, FileOperations.files_identical(src_file, dest_file)
+            else:
+                same_size.append((src_file, dest_file))
+                if len(same_size) >= self.HASH_BATCH_SIZE:
+                    yield from self._compare_batch(hash_pool, same_size)
+                    same_size = []
+                    # Bounded batches keep a reconcile preemptible while
+                    # the pool does its most expensive work
+                    if yield_to:
+                        yield_to()
+        yield from self._compare_batch(hash_pool, same_size)
+
+    def _compare_batch(self, hash_pool, pairs):
+        digests = hash_pool.hash_files(
+            path for pair in pairs for path in pair)
+        for src_file, dest_file in pairs:
+            digest = digests[src_file]
+            yield src_file, dest_file, digest is not None and digest == digests[dest_file]
+
     def _is_excluded(self, path, exclusions):
         path = path.replace('\\', '/')
         return any(excl in path for excl in exclusions)
 
-    def _cleanup_deleted_items(self, source, destination, exclusions):
+    def _cleanup_deleted_items(self, source, destination, exclusions, yield_to=None):
         stats = {'removed': 0, 'errors': 0}
         try:
             if not os.path.exists(destination):
@@ -117,6 +404,8 @@ class Synchronizer:
                 src_dir = os.path.join(source, rel_path)
 
                 for file in files:
+                    if yield_to:
+                        yield_to()
                     dest_file = os.path.join(root, file)
                     src_file = os.path.join(src_dir, file)
 
@@ -153,9 +442,16 @@ class Synchronizer:
             logger.error(f"Error during cleanup: {e}")
         return stats
 
+    def invalidate_status(self, replication):
+        self.status_cache.pop(replication['source'], None)
+
     def check_status(self, replication):
         source = replication['source']
         destination = replication['destination']
+        cached = self.status_cache.get(source)
+        if cached and time.time() - cached[0] < self.STATUS_CACHE_TTL:
+            return dict(cached[1])
+
         stats = {
             'last_sync': replication.get('last_sync', 'Never'),
             'source_files': 0,
@@ -180,4 +476,6 @@ class Synchronizer:
             stats['errors'] += 1
             logger.error(f"Error checking status: {str(e)}")
 
+        if not stats['errors']:
+            self.status_cache[source] = (time.time(), dict(stats))
         return stats
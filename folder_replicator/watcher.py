@@ -1,62 +1,130 @@
 import time
 import threading
 import logging
+from concurrent.futures import Future
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from folder_replicator.file_operations import FileOperations
+from folder_replicator.scheduler import ReplicationScheduler
+from folder_replicator.verification import Verifier
 
 logger = logging.getLogger("FolderReplicator")
 
 
 class ReplicationHandler(FileSystemEventHandler):
-    def __init__(self, synchronizer, replication):
+    def __init__(self, scheduler):
         super().__init__()
-        self.synchronizer = synchronizer
-        self.replication = replication
-        self.debounce_interval = 2
-        self.last_event_time = 0
+        self.scheduler = scheduler
+
+    def on_any_event(self, event):
+        self.scheduler.synchronizer.invalidate_status(
+            self.scheduler.replication)
 
     def on_modified(self, event):
-        current_time = time.time()
-        if not event.is_directory and (current_time - self.last_event_time) > self.debounce_interval:
+        if not event.is_directory:
             logger.info(f"Detected modification: {event.src_path}")
-            self.synchronizer.sync_replication(self.replication)
-            self.last_event_time = current_time
+            self.scheduler.submit_event(event.src_path)
 
     def on_created(self, event):
-        if not event.is_directory:
-            logger.info(f"Detected new file: {event.src_path}")
-            self.synchronizer.sync_replication(self.replication)
+        kind = 'directory' if event.is_directory else 'file'
+        logger.info(f"Detected new {kind}: {event.src_path}")
+        self.scheduler.submit_event(event.src_path)
 
     def on_deleted(self, event):
         logger.info(f"Detected deletion: {event.src_path}")
-        self.synchronizer.sync_replication(self.replication)
+        self.scheduler.submit_event(event.src_path)
 
     def on_moved(self, event):
         logger.info(f"Detected move: {event.src_path} → {event.dest_path}")
-        self.synchronizer.sync_replication(self.replication)
+        self.scheduler.submit_event(event.src_path, event.dest_path)
+
+
+class DestinationHandler(FileSystemEventHandler):
+    # Destination changes are never replicated back; they only make the
+    # cached file counts stale
+    def __init__(self, synchronizer, replication):
+        super().__init__()
+        self.synchronizer = synchronizer
+        self.replication = replication
+
+    def on_created(self, event):
+        self.synchronizer.invalidate_status(self.replication)
+
+    def on_deleted(self, event):
+        self.synchronizer.invalidate_status(self.replication)
+
+    def on_moved(self, event):
+        self.synchronizer.invalidate_status(self.replication)
 
 
 class ReplicationWatcher:
     def __init__(self, synchronizer, interval_minutes=60):
         self.synchronizer = synchronizer
-        self.observers = []
+        self.observers = {}
+        self.schedulers = {}
         self.interval = interval_minutes * 60
         self.stop_event = threading.Event()
 
+    def start(self):
+        for replication in self.synchronizer.config_manager.get_replications():
+            self.watch_replication(replication)
+
+        sync_thread = threading.Thread(target=self._periodic_sync)
+        sync_thread.daemon = True
+        sync_thread.start()
+
+        verify_thread = threading.Thread(target=self._periodic_verify)
+        verify_thread.daemon = True
+        verify_thread.start()
+
+    def watch_replication(self, replication):
+        scheduler = ReplicationScheduler(self.synchronizer, replication)
+        scheduler.start()
+        self.schedulers[replication['source']] = scheduler
+
+        observer = Observer()
+        observer.schedule(ReplicationHandler(scheduler),
+                          replication['source'], recursive=True)
+        if FileOperations.ensure_directory_exists(replication['destination']):
+            observer.schedule(DestinationHandler(self.synchronizer, replication),
+                              replication['destination'], recursive=True)
+        observer.start()
+        self.observers[replication['source']] = observer
+        logger.info(f"Watching for changes: {replication['source']}")
+
+    def unwatch_replication(self, source):
+        observer = self.observers.pop(source, None)
+        if observer:
+            observer.stop()
+            observer.join()
+            logger.info(f"Stopped watching: {source}")
+        scheduler = self.schedulers.pop(source, None)
+        if scheduler:
+            scheduler.stop()
+
+    def request_sync(self, replication):
+        scheduler = self.schedulers.get(replication['source'])
+        if scheduler:
+            return scheduler.request_reconcile()
+        future = Future()
+        future.set_result(self.synchronizer.sync_replication(replication))
+        return future
+
+    def request_verify(self, replication, sample=None, rate_limit=None, repair=False):
+        def verify(yield_to=None):
+            return Verifier(self.synchronizer, rate_limit).verify_replication(
+                replication, sample=sample, repair=repair, yield_to=yield_to)
+
+        scheduler = self.schedulers.get(replication['source'])
+        if scheduler:
+            return scheduler.submit_job(verify)
+        future = Future()
+        future.set_result(verify())
+        return future
+
     def watch(self):
         try:
-            for replication in self.synchronizer.config_manager.get_replications():
-                observer = Observer()
-                handler = ReplicationHandler(self.synchronizer, replication)
-                observer.schedule(
-                    handler, replication['source'], recursive=True)
-                observer.start()
-                self.observers.append(observer)
-                logger.info(f"Watching for changes: {replication['source']}")
-
-            sync_thread = threading.Thread(target=self._periodic_sync)
-            sync_thread.daemon = True
-            sync_thread.start()
+            self.start()
 
             logger.info("Press Ctrl+C to stop watching...")
             while not self.stop_event.is_set():
@@ -72,17 +140,41 @@ class ReplicationWatcher:
         while not self.stop_event.is_set():
             logger.info(
                 f"Running periodic sync (every {self.interval//60} minutes)")
-            self.synchronizer.sync_all()
+            # Reconciliation is queued behind live events on each
+            # replication's scheduler instead of racing them
+            for scheduler in list(self.schedulers.values()):
+                scheduler.request_reconcile()
 
             for _ in range(self.interval):
                 if self.stop_event.is_set():
                     break
                 time.sleep(1)
 
+    def _periodic_verify(self):
+        last_run = time.time()
+        while not self.stop_event.is_set():
+            time.sleep(1)
+            # Read on every tick so config set takes effect without a restart
+            settings = self.synchronizer.config_manager.get_config()
+            interval = settings.get('verify_interval', 0) * 60
+            if not interval or time.time() - last_run < interval:
+                continue
+            last_run = time.time()
+
+            sample = settings.get('verify_sample', 100) or None
+            rate = settings.get('verify_rate', 10)
+            logger.info(f"Running background integrity scrub (every {interval//60} minutes)")
+            for replication in list(self.synchronizer.config_manager.get_replications()):
+                self.request_verify(replication, sample=sample,
+                                    rate_limit=rate * 1024 * 1024 if rate else None)
+
     def stop(self):
         logger.info("Stopping watchers and sync threads")
         self.stop_event.set()
-        for observer in self.observers:
+        for observer in self.observers.values():
             observer.stop()
-        for observer in self.observers:
+        for observer in self.observers.values():
             observer.join()
+        for scheduler in self.schedulers.values():
+            scheduler.stop()
+        self.synchronizer.close()
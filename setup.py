@@ -30,7 +30,7 @@ setup(
         "watchdog>=2.1.0",
         "lockfile>=0.12.2",
     ] + (
-        ["daemon>=1.2"] if sys.platform != "win32" else ["pywin32>=300"]
+        ["python-daemon>=2.3"] if sys.platform != "win32" else ["pywin32>=300"]
     ),
     entry_points={
         "console_scripts": [